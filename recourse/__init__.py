@@ -5,7 +5,7 @@ from recourse import flipset
 
 from recourse.action_set import ActionSet
 from recourse.auditor import RecourseAuditor
-from recourse.builder import RecourseBuilder
+from recourse.builder import RecourseBuilder, solve_batch
 from recourse.flipset import Flipset
 
 __all__ = ["action_set", "auditor", "builder", "flipset"]
@@ -4,6 +4,7 @@ import pandas as pd
 import itertools
 from collections import namedtuple
 from prettytable import PrettyTable
+from recourse.defaults import CHECKS_ENABLED
 from recourse.helper_functions import parse_classifier_args
 from scipy.stats import gaussian_kde as kde
 from scipy.interpolate import interp1d
@@ -22,7 +23,7 @@ class ActionSet(object):
     """
 
     _default_print_flag = True
-    _default_check_flag = True
+    _default_check_flag = CHECKS_ENABLED
     _default_bounds = (1, 99, 'percentile')
     _default_step_type = 'relative'
 
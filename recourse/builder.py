@@ -1,7 +1,8 @@
 import time
 import warnings
-from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
 from collections import defaultdict
+from operator import attrgetter
 from recourse.defaults import *
 from recourse.defaults import _SOLVER_TYPE_CPX, _SOLVER_TYPE_PYTHON_MIP
 from recourse.helper_functions import parse_classifier_args
@@ -16,16 +17,49 @@ except ImportError:
 
 try:
     import mip
-    from mip import Model, xsum
+    from mip import Model, LinExpr, BINARY, CONTINUOUS, MINIMIZE, CBC
 except ImportError:
     pass
 
-__all__ = ['RecourseBuilder']
+__all__ = ['RecourseBuilder', 'solve_batch']
+
+
+# cost of changing a feature from percentile c0 (the null action) to percentile c
+def _local_cost_up(c, c0):
+    return np.log((1.0 - c0) / (1.0 - c))
+
+
+def _local_cost_dn(c, c0):
+    return np.log((1.0 - c) / (1.0 - c0))
+
+
+def _linear_cost_up(c, c0):
+    return c - c0
+
+
+def _linear_cost_dn(c, c0):
+    return c0 - c
+
+
+_PERCENTILE_COST_FUNCTIONS = {
+    'local': (_local_cost_up, _local_cost_dn),
+    'total': (_linear_cost_up, _linear_cost_dn),
+    'max': (_linear_cost_up, _linear_cost_dn),
+    }
+
+
+# values of a list of Python-MIP variables in the current solution, read with one pass over the list
+_get_mip_var_value = attrgetter('x')
+
+
+def _get_mip_var_values(variables):
+    return np.fromiter(map(_get_mip_var_value, variables), dtype = np.float64, count = len(variables))
+
 
 # todo fix bug when all points are non-zero but non-action (demo_credit_script shouldn't run)
 class RecourseBuilder(object):
 
-    _default_check_flag = True
+    _default_check_flag = CHECKS_ENABLED
     _default_print_flag = True
     _default_node_limit = float('inf')
     _default_time_limit = float('inf')
@@ -68,6 +102,7 @@ class RecourseBuilder(object):
         self._variable_names = action_set.name
         self._variable_index = {n: j for j, n in enumerate(self._variable_names)}
         self._actionable_indices = [j for j, v in enumerate(action_set.actionable) if v]
+        self._actionable_mask = np.array(action_set.actionable, dtype = bool)
 
         # flags
         self.print_flag = kwargs.get('print_flag', self._default_print_flag)
@@ -76,6 +111,11 @@ class RecourseBuilder(object):
         # initialize Cplex MIP
         self._mip = None
         self._mip_cost_type = kwargs.get('mip_cost_type', self._default_mip_cost_type)
+        if self._mip_cost_type not in self._valid_mip_cost_types:
+            raise ValueError("pick mip_cost_type in: %r" % sorted(self._valid_mip_cost_types))
+
+        # cost type is fixed for the builder, so the cost functions are picked once here
+        self._cost_functions = _PERCENTILE_COST_FUNCTIONS[self._mip_cost_type]
         self._min_items = 0
         self._max_items = self.n_actionable
 
@@ -170,13 +210,20 @@ class RecourseBuilder(object):
     #### feature values ####
     @property
     def x(self):
-        return np.array(self._x)
+        """
+        :return: read-only view of the feature values (use x.copy() to get a mutable array)
+        """
+        if self._x is None:
+            return np.array(self._x)
+        x = self._x.view()
+        x.flags.writeable = False
+        return x
 
 
     @x.setter
     def x(self, x):
         assert isinstance(x, (list, np.ndarray))
-        x = np.array(x, dtype = np.float_).flatten()
+        x = np.array(x, dtype = np.float64).ravel()
         assert len(x) == self.n_variables
         self._x = x
         self.build_mip()
@@ -197,7 +244,7 @@ class RecourseBuilder(object):
             x = self._x
         else:
             assert isinstance(x, (np.ndarray, list))
-            x = np.array(x, dtype = np.float).flatten()
+            x = np.asarray(x, dtype = np.float64).ravel() # no copy when x is already a flat float array
         return self._coefficients.dot(x) + self._intercept
 
 
@@ -268,7 +315,7 @@ class RecourseBuilder(object):
         elif not isinstance(flag, bool):
             raise ValueError('mip_display must be boolean')
         self._set_mip_display(self.mip, flag)
-        self._mip_node_limit = flag
+        self._mip_display_flag = flag
 
 
     #### mip item limits ####
@@ -280,22 +327,20 @@ class RecourseBuilder(object):
         :return:
         """
 
-        if min_items is None or max_items is None:
+        if min_items is None and max_items is None:
             return
 
         min_items = self.min_items if min_items is None else int(min_items)
-        max_items = self.max_items if min_items is None else int(max_items)
+        max_items = self.max_items if max_items is None else int(max_items)
         assert min_items <= max_items, 'incompatible sizes'
 
-        min_items = int(min_items)
-        if min_items != self.min_items:
-            min_nnz_actions = float(self.n_actionable - min_items)
-            self.set_mip_min_items(min_nnz_actions)
+        if min_items != self.min_items or max_items != self.max_items:
+            # the size constraints only count features that have actions in the MIP
+            n_actionable = len(self._mip_indices['action_off_names'])
+            min_nnz_actions = float(n_actionable - min_items)
+            max_nnz_actions = float(n_actionable - max_items)
+            self.set_mip_min_max_items(min_nnz_actions, max_nnz_actions)
             self.min_items = min_items
-
-        if max_items != self.max_items:
-            max_nnz_actions = float(self.n_actionable - max_items)
-            self.set_mip_max_items(min_nnz_actions)
             self.max_items = max_items
 
         return
@@ -336,89 +381,120 @@ class RecourseBuilder(object):
 
         assert cost_function_type == 'percentile'
 
-        build_info = {}
         indices = defaultdict(list)
 
         # get names of constrained variables
         constrained_names = self.action_set.constraints.constrained_names()
 
         # setup cost function
-        if self.mip_cost_type == 'local':
-            cost_up = lambda c: np.log((1.0 - c[0])/(1.0 - c))
-            cost_dn = lambda c: np.log((1.0 - c) / (1.0 - c[0]))
-        else:
-            cost_up = lambda c: c - c[0]
-            cost_dn = lambda c: c[0] - c
+        cost_up, cost_dn = self._cost_functions
 
         # todo: set this to returns_compatible = True and check if that changes anything.
         actions, percentiles = self._action_set.feasible_grid(x = self._x, return_actions = True, return_percentiles = True, return_compatible = True)
 
-        for n, a in actions.items():
-
-            if len(a) >= 2:
-
-                c = percentiles[n]
-                if np.isclose(a[-1], 0.0):
-                    a = np.flip(a, axis = 0)
-                    c = np.flip(c, axis = 0)
-                    c = cost_dn(c)
-                else:
-                    c = cost_up(c)
-
-                # override numerical issues
-                bug_idx = np.logical_or(np.less_equal(c, 0.0), np.isclose(a, 0.0, atol = 1e-8))
-                bug_idx = np.flatnonzero(bug_idx).tolist()
-                bug_idx.pop(0)
-                if len(bug_idx) > 0:
-                    c = np.delete(c, bug_idx)
-                    a = np.delete(a, bug_idx)
-
-                idx = self._variable_index[n]
-                w = float(self._coefficients[idx])
-                #da = np.diff(a)
-                dc = np.diff(c)
-
-
-                # find nullifying index
-                # k_null is index such that x[j] - a[j][k_null] = 0
-                # action at nullifying index sets the variable to 0
-                x = self._x[idx]
-                if n in constrained_names and x > 0:
-                    k_null = np.flatnonzero(a == -x)[0]
-                else:
-                    k_null = 0
-
-                info = {
-                    'idx': idx,
-                    'coef': w,
-                    'actions': a.tolist(),
-                    'costs': c.tolist(),
-                    'action_var_name': ['a[%d]' % idx],
-                    'action_ind_names': ['u[%d][%d]' % (idx, k) for k in range(len(a))],
-                    'cost_var_name': ['c[%d]' % idx],
-                    'nullify_ind_name': ['u[%d][%d]' % (idx, k_null)],
-                    }
-
-                build_info[n] = info
-
-                indices['var_idx'].append(idx)
-                indices['coefficients'].append(w)
-                indices['action_off_names'].append(info['action_ind_names'][0])  ## the indices of variables that indicate that the feature is "off", i.e. no actions are taken on that feature.
-                indices['action_ind_names'].extend(info['action_ind_names'])
-                #
-                indices['nullify_ind_names'].append(info['nullify_ind_name'][0])
-                #indices['nullify_ind_values'].append(k_null)
-                #
-                indices['action_var_names'].extend(info['action_var_name'])
-                indices['cost_var_names'].extend(info['cost_var_name'])
-                indices['action_lb'].append(float(np.min(a)))
-                indices['action_ub'].append(float(np.max(a)))
-                # indices['action_df'].append(float(np.min(da)))
-                indices['cost_ub'].append(float(np.max(c)))
-                indices['cost_df'].append(float(np.min(dc)))
+        # build information is stored column-wise: one entry per feature for names / idx / coef / sizes / null_idx,
+        # and flat arrays of actions and costs where the entries of the i-th feature are in starts[i]:starts[i+1]
+        # (null_idx[i] is the position of the nullifying indicator of the i-th feature in the flat arrays)
+        names = [n for n, a in actions.items() if len(a) >= 2]
+        n_valid = len(names)
+        sizes = np.array([len(actions[n]) for n in names], dtype = np.intp)
+        starts = np.zeros(n_valid + 1, dtype = np.intp)
+        starts[1:] = np.cumsum(sizes)
+
+        # actions and costs for all features are computed on the flat arrays
+        if n_valid > 0:
+            a = np.concatenate([actions[n] for n in names])
+            p = np.concatenate([percentiles[n] for n in names])
+            first, last = starts[:-1], starts[1:] - 1
+            seg = np.repeat(np.arange(n_valid), sizes)
+
+            # reverse the entries of features whose grid ends with the null action so every feature starts with it
+            flip = np.isclose(a[last], 0.0)
+            offset = np.arange(len(a)) - first[seg]
+            order = np.where(flip[seg], last[seg] - offset, first[seg] + offset)
+            a = a[order]
+            p = p[order]
+
+            up = ~flip[seg]
+            p0 = p[first][seg]
+            c = np.empty_like(p)
+            c[up] = cost_up(p[up], p0[up])
+            c[~up] = cost_dn(p[~up], p0[~up])
+
+            # NaN costs (e.g. from degenerate percentiles) are rejected rather than dropped with the numerical issues below
+            nan_idx = np.isnan(c)
+            if np.any(nan_idx):
+                raise ValueError('cost of actions is NaN for features: %s' % [names[i] for i in np.unique(seg[nan_idx])])
+
+            # override numerical issues: drop actions with non-positive cost or a near-zero action
+            # (the first entry of each feature is the null action with zero cost, and is always kept)
+            keep = np.greater(c, 0.0) & np.greater(np.abs(a), 1e-8)
+            keep[first] = True
+            a = a[keep]
+            c = c[keep]
+            sizes = np.bincount(seg[keep], minlength = n_valid)
+            starts[1:] = np.cumsum(sizes)
+        else:
+            a = np.empty(0)
+            c = np.empty(0)
+
+        indices['var_idx'] = np.array([self._variable_index[n] for n in names], dtype = np.intp)
+        indices['coefficients'] = np.array(self._coefficients[indices['var_idx']], dtype = np.float64)
+        build_info = {
+            'names': names,
+            'idx': indices['var_idx'],
+            'coef': indices['coefficients'],
+            'actions': a,
+            'costs': c,
+            'sizes': sizes,
+            'starts': starts,
+            'null_idx': np.array(starts[:-1]),
+            }
+
+        for i, (n, idx) in enumerate(zip(names, indices['var_idx'])):
+
+            # find nullifying index
+            # k_null is index such that x[j] - a[j][k_null] = 0
+            # action at nullifying index sets the variable to 0
+            x = self._x[idx]
+            if n in constrained_names and x > 0:
+                k_null = np.flatnonzero(a[starts[i]:starts[i + 1]] == -x)[0]
+                build_info['null_idx'][i] += k_null
+
+        # names of indicators u[j][k] are generated from the (j, k) pairs of all entries in the flat arrays
+        ind_j = np.repeat(indices['var_idx'], sizes).tolist()
+        ind_k = (np.arange(starts[-1]) - np.repeat(starts[:-1], sizes)).tolist()
+        indices['action_ind_names'] = ['u[%d][%d]' % jk for jk in zip(ind_j, ind_k)]
+        ## the indices of variables that indicate that the feature is "off", i.e. no actions are taken on that feature.
+        indices['action_off_names'] = [indices['action_ind_names'][s] for s in starts[:-1]]
+        indices['nullify_ind_names'] = [indices['action_ind_names'][s] for s in build_info['null_idx']]
+        indices['action_var_names'] = ['a[%d]' % idx for idx in indices['var_idx']]
+
+        # cost variables c[j] are only part of the max cost formulation
+        if self.mip_cost_type == 'max':
+            indices['cost_var_names'] = ['c[%d]' % idx for idx in indices['var_idx']]
+
+        # bounds on actions and costs for each feature are computed with reductions over the flat arrays
+        if n_valid > 0:
+            first = starts[:-1]
+            indices['action_lb'] = np.minimum.reduceat(a, first)
+            indices['action_ub'] = np.maximum.reduceat(a, first)
+            indices['cost_ub'] = np.maximum.reduceat(c, first)
+            # smallest cost increment within each feature (increments between features are masked out)
+            dc = np.diff(c)
+            dc[first[1:] - 1] = np.inf
+            indices['cost_df'] = np.minimum.reduceat(dc, first)
+            # weight of the individual costs in the max cost objective
+            indices['epsilon'] = indices['cost_df'].min() / indices['cost_ub'].sum()
+        else:
+            for field in ('action_lb', 'action_ub', 'cost_ub', 'cost_df'):
+                indices[field] = np.empty(0)
+            indices['epsilon'] = np.inf
+
+        indices['action_ind_costs'] = c
 
         # get names of variables associated with constraints
-        if validate:
+        if validate and self.check_flag:
             assert self._check_mip_build_info(build_info)
 
         return build_info, indices
@@ -426,26 +502,41 @@ class RecourseBuilder(object):
 
     def _check_mip_build_info(self, build_info):
 
+        n_features = len(build_info['names'])
+        if n_features == 0:
+            return True
+
         y_desired = self.action_set.y_desired
         constrained_names = self.action_set.constraints.constrained_names()
-        for k, v in build_info.items():
-
-            assert not np.isclose(v['coef'], 0.0)
-            a = np.array(v['actions'])
-            c = np.array(v['costs'])
-            assert c[0] == 0.0
-            assert a[0] == 0.0
-
-            if k not in constrained_names:
-                if y_desired * np.sign(v['coef']) > 0:
-                    assert np.all(np.greater(a[1:], 0.0))
-                else:
-                    assert np.all(np.less(a[1:], 0.0))
 
-            assert len(a) >= 2
-            assert len(a) == len(c)
-            assert len(a) == len(np.unique(a))
-            assert len(c) == len(np.unique(c))
+        # seg[i] is the feature of the i-th entry of the flat actions and costs
+        a = build_info['actions']
+        c = build_info['costs']
+        starts = build_info['starts']
+        sizes = build_info['sizes']
+        assert np.all(sizes >= 2)
+        assert len(a) == len(c) == starts[-1]
+        assert np.array_equal(np.diff(starts), sizes)
+
+        seg = np.repeat(np.arange(n_features), sizes)
+        is_start = np.zeros(len(a), dtype = bool)
+        is_start[starts[:-1]] = True
+
+        coefs = build_info['coef']
+        assert not np.any(np.isclose(coefs, 0.0))
+        assert np.all(a[is_start] == 0.0)
+        assert np.all(c[is_start] == 0.0)
+
+        # actions for unconstrained features must move the score towards y_desired
+        increasing = np.greater(y_desired * np.sign(coefs), 0)[seg]
+        unconstrained = np.array([k not in constrained_names for k in build_info['names']])[seg]
+        to_check = unconstrained & ~is_start
+        assert np.all(np.where(increasing, np.greater(a, 0.0), np.less(a, 0.0))[to_check])
+
+        # actions and costs must be distinct within each feature
+        for v in (a, c):
+            order = np.lexsort((v, seg))
+            assert not np.any((np.diff(v[order]) == 0.0) & (np.diff(seg[order]) == 0))
 
         return True
 
@@ -481,41 +572,37 @@ class RecourseBuilder(object):
         """
         :return: return True if making the change from the Flipset will actually 'flip' the prediction for the classifier
         """
-        if info['feasible']:
+        if self.check_flag and info['feasible']:
             a = info['actions']
-            all_idx = np.arange(len(a))
-            static_idx = np.flatnonzero(np.isclose(a, 0.0, rtol = 1e-4))
-            action_idx = np.setdiff1d(all_idx, static_idx)
-            n_items = len(action_idx)
+            static_mask = np.isclose(a, 0.0, rtol = 1e-4)
+            action_mask = ~static_mask
+            n_items = np.count_nonzero(action_mask)
             assert n_items >= 1
             assert self.min_items <= n_items <= self.max_items
 
-            try:
-                assert np.all(np.isin(action_idx, self.actionable_indices))
-            except AssertionError:
+            # issues that only produce warnings are checked with plain conditions since this runs after every solve
+            if not np.all(self._actionable_mask[action_mask]):
                 warnings.warn('action set no in self.actionable_indices')
 
-            x = self.x
-            try:
-                assert np.not_equal(self.prediction(x), self.prediction(x + a))
-            except AssertionError:
-                s = self.score(x + a)
-                assert not np.isclose(self.score(x + a), 0.0, atol = 1e-4)
-                warnings.warn('numerical issue: near-zero score(x + a) = %1.8f' % s)
-
-            try:
-                # check costs change -> action
-                assert np.all(np.greater(info['costs'][action_idx], 0.0))
-                assert np.all(np.isclose(info['costs'][static_idx], 0.0))
-
-                # check total cost
-                if self.mip_cost_type == 'max':
-                    if not np.isclose(info['cost'], np.max(info['costs']), rtol = 1e-4):
-                        warnings.warn('numerical issue: max_cost is %1.2f but maximum of cost[j] is %1.2f' % (info['cost'], np.max(info['costs'])))
-                elif self.mip_cost_type == 'total':
-                    assert np.isclose(info['cost'], np.sum(info['costs']))
-
-            except AssertionError:
+            # action should produce the desired outcome unless x already has it
+            y_desired = self.action_set.y_desired
+            if np.less_equal(y_desired * self.score(), 0.0):
+                s_new = self.score(self._x + a)
+                if np.less_equal(y_desired * s_new, 0.0):
+                    assert np.isclose(s_new, 0.0, atol = 1e-4)
+                    warnings.warn('numerical issue: near-zero score(x + a) = %1.8f' % s_new)
+
+            # check costs change -> action
+            costs_ok = np.all(np.greater(info['costs'][action_mask], 0.0)) and np.all(np.isclose(info['costs'][static_mask], 0.0))
+
+            # check total cost
+            if costs_ok and self.mip_cost_type == 'max':
+                if not np.isclose(info['cost'], np.max(info['costs']), rtol = 1e-4):
+                    warnings.warn('numerical issue: max_cost is %1.2f but maximum of cost[j] is %1.2f' % (info['cost'], np.max(info['costs'])))
+            elif costs_ok and self.mip_cost_type == 'total':
+                costs_ok = np.isclose(info['cost'], np.sum(info['costs']))
+
+            if not costs_ok:
                 warnings.warn('issue detected with %s' % str(info))
 
         return True
@@ -545,6 +632,7 @@ class RecourseBuilder(object):
         end_time = time.process_time() - start_time
         info = self.solution_info
         info['runtime'] = end_time
+        assert self._check_mip_solution(info)
         return info
 
 
@@ -593,6 +681,7 @@ class RecourseBuilder(object):
         while k < total_items:
             self.solve_mip()
             info = self.solution_info
+            assert self._check_mip_solution(info)
             if not info['feasible']:
                 if self.print_flag:
                     print('recovered all minimum-cost items')
@@ -653,7 +742,7 @@ class _RecourseBuilderCPX(RecourseBuilder):
         mip.set_problem_type(mip.problem_type.MILP)
         vars = mip.variables
         cons = mip.linear_constraints
-        n_actionable = len(build_info)
+        n_actionable = len(build_info['names'])
         n_indicators = len(indices['action_ind_names'])
 
         # define a[j]
@@ -671,22 +760,79 @@ class _RecourseBuilderCPX(RecourseBuilder):
                  senses = [score_constraint_sense],
                  rhs = [-self.score()])
 
-        # define indicators u[j][k] = 1 if a[j] = actions[j][k]
-        vars.add(names = indices['action_ind_names'], types = ['B'] * n_indicators)
+        # define cost variables for the max cost function
+        if cost_type == 'max':
+            indices['max_cost_var_name'] = ['max_cost']
+            vars.add(names = indices['max_cost_var_name'] + indices['cost_var_names'],
+                     types = ['C'] * (n_actionable + 1),
+                     obj = [1.0] + [indices['epsilon']] * n_actionable)
 
         # restrict a[j] to feasible values using a 1 of K constraint setup
-        # restrict a[j] to actions in feasible set and make sure exactly 1 indicator u[j][k] is on
-        for info in build_info.values():
-            # 1. a[j]  =   sum_k u[j][k] * actions[j][k] -> 0.0   =   sum u[j][k] * actions[j][k] - a[j]
-            # 2. sum_k u[j][k] = 1.0
-            cons.add(names = ['set_a[%d]' % info['idx'], 'pick_a[%d]' % info['idx']],
-                     lin_expr = [SparsePair(ind = info['action_var_name'] + info['action_ind_names'], val = [-1.0] + info['actions']),
-                                 SparsePair(ind = info['action_ind_names'], val = [1.0] * len(info['actions']))],
-                     senses = ["E", "E"],
-                     rhs = [0.0, 1.0])
+        # rows are added before the indicators u[j][k], which fill in their coefficients column-wise below
+        #
+        # 1. a[j]  =   sum_k u[j][k] * actions[j][k] -> 0.0   =   sum u[j][k] * actions[j][k] - a[j]
+        # 2. sum_k u[j][k] = 1.0
+        # 3. cost[j] = sum_k c[j][k] * u[j][k] (max cost only)
+        # 4. max_cost >= cost[j] (max cost only)
+        all_names, all_lin, all_senses, all_rhs = [], [], [], []
+        for n, (j, action_var_name) in enumerate(zip(build_info['idx'], indices['action_var_names'])):
+            all_names.extend(['set_a[%d]' % j, 'pick_a[%d]' % j])
+            all_lin.extend([SparsePair(ind = [action_var_name], val = [-1.0]), SparsePair()])
+            all_senses.extend(['E', 'E'])
+            all_rhs.extend([0.0, 1.0])
+            if cost_type == 'max':
+                cost_var_name = indices['cost_var_names'][n]
+                all_names.extend(['def_cost[%d]' % j, 'set_max_cost[%d]' % j])
+                all_lin.extend([SparsePair(ind = [cost_var_name], val = [-1.0]),
+                                SparsePair(ind = indices['max_cost_var_name'] + [cost_var_name], val = [1.0, -1.0])])
+                all_senses.extend(['E', 'G'])
+                all_rhs.extend([0.0, 0.0])
+
+        cons.add(names = all_names, lin_expr = all_lin, senses = all_senses, rhs = all_rhs)
+
+        # define indicators u[j][k] = 1 if a[j] = actions[j][k] with their coefficients in rows 1-3
+        # for the total and local cost functions, c[j][k] is the objective coefficient of u[j][k]
+        rows_per_feature = 4 if cost_type == 'max' else 2
+        row_offset = cons.get_num() - len(all_names)
+        starts = build_info['starts']
+        actions = build_info['actions'].tolist()
+        set_a_rows = np.repeat(row_offset + rows_per_feature * np.arange(n_actionable), build_info['sizes']).tolist()
+        costs = build_info['costs'].tolist()
+        ind_columns = []
+        for r, a, c in zip(set_a_rows, actions, costs):
+            # zero coefficients (e.g. for the null action a[j][k] = 0) are left out of the column
+            ind, val = [r + 1], [1.0]
+            if a != 0.0:
+                ind.append(r)
+                val.append(a)
+            if cost_type == 'max' and c != 0.0:
+                ind.append(r + 2)
+                val.append(c)
+            ind_columns.append(SparsePair(ind = ind, val = val))
+
+        if cost_type == 'max':
+            vars.add(names = indices['action_ind_names'], types = ['B'] * n_indicators, columns = ind_columns)
+        else:
+            vars.add(names = indices['action_ind_names'], types = ['B'] * n_indicators, columns = ind_columns, obj = indices['action_ind_costs'])
+
+        # cache column indices of variables that are queried after each solve (stored as tuples since they never change)
+        # columns follow the order in which variables were added: a[j], then max_cost and c[j] (max cost only), then u[j][k]
+        ind_offset = vars.get_num() - n_indicators
+        col_idx = {
+            'action_var': tuple(range(n_actionable)),
+            'action_ind': tuple(range(ind_offset, ind_offset + n_indicators)),
+            'action_off': tuple((ind_offset + starts[:-1]).tolist()),
+            'nullify_ind': tuple((ind_offset + build_info['null_idx']).tolist()),
+            }
 
-            # declare indicator variables as SOS set
-            mip.SOS.add(type = "1", name = "sos_u[%d]" % info['idx'], SOS = SparsePair(ind = info['action_ind_names'], val = info['actions']))
+        if cost_type == 'max':
+            col_idx['cost_var'] = tuple(range(n_actionable + 1, 2 * n_actionable + 1))
+            col_idx['max_cost_var'] = (n_actionable,)
+
+        # declare indicator variables as SOS set (CPLEX adds one SOS per call)
+        for n, j in enumerate(build_info['idx']):
+            s, e = starts[n], starts[n + 1]
+            mip.SOS.add(type = "1", name = "sos_u[%d]" % j, SOS = SparsePair(ind = indices['action_ind_names'][s:e], val = actions[s:e]))
 
         # limit number of features per action
         #
@@ -704,6 +850,7 @@ class _RecourseBuilderCPX(RecourseBuilder):
                  lin_expr = [size_expr, size_expr],
                  senses = ['G', 'L'],
                  rhs = [float(n_actionable - max_items), float(n_actionable - min_items)])
+        row_idx = dict(zip(['max_items', 'min_items'], cons.get_indices(['max_items', 'min_items'])))
 
 
 
@@ -736,74 +883,11 @@ class _RecourseBuilderCPX(RecourseBuilder):
                      range_values = [float(c.ub - c.lb)])
 
 
-        # add constraints for cost function
-        if cost_type in ('total', 'local'):
-            indices.pop('cost_var_names')
-            objval_pairs = list(chain(*[list(zip(v['action_ind_names'], v['costs'])) for v in build_info.values()]))
-            mip.objective.set_linear(objval_pairs)
-
-        elif cost_type == 'max':
-
-            indices['max_cost_var_name'] = ['max_cost']
-
-            ## handle empty actionsets
-            indices['epsilon'] = np.min(indices['cost_df'] or np.inf) / np.sum(indices['cost_ub'])
-            vars.add(names = indices['max_cost_var_name'] + indices['cost_var_names'],
-                     types = ['C'] * (n_actionable + 1),
-                     obj = [1.0] + [indices['epsilon']] * n_actionable)
-
-            #lb = [0.0] * (n_actionable + 1)) # default values are 0.0
-            cost_constraints = {
-                'names': [],
-                'lin_expr': [],
-                'senses': ["E", "G"] * n_actionable,
-                'rhs': [0.0, 0.0] * n_actionable,
-                }
-
-            for info in build_info.values():
-
-                cost_constraints['names'].extend([
-                    'def_cost[%d]' % info['idx'],
-                    'set_max_cost[%d]' % info['idx']
-                    ])
-
-                cost_constraints['lin_expr'].extend([
-                    SparsePair(ind = info['cost_var_name'] + info['action_ind_names'], val = [-1.0] + info['costs']),
-                    SparsePair(ind = indices['max_cost_var_name'] + info['cost_var_name'], val = [1.0, -1.0])
-                ])
-
-            cons.add(**cost_constraints)
-
-            # old code (commented out for speed)
-            #
-            # vars.add(names = indices['cost_var_names'],
-            #          types = ['C'] * n_actionable,
-            #          obj = [indices['epsilon']] * n_actionable,
-            #          #ub = [CPX_INFINITY] * n_actionable, #indices['cost_ub'], #indices['cost_ub'],
-            #          lb = [0.0] * n_actionable)
-            #
-            # vars.add(names = indices['max_cost_var_name'],
-            #          types = ['C'],
-            #          obj = [1.0],
-            #          #ub = [np.max(indices['cost_ub'])],
-            #          lb = [0.0])
-            #
-            # for info in build_info.values():
-            #     cost[j] = sum c[j][k] u[j][k]
-            #     cons.add(names = ['def_cost[%d]' % info['idx']],
-            #              lin_expr = [SparsePair(ind = info['cost_var_name'] + info['action_ind_names'], val = [-1.0] + info['costs'])]
-            #              senses = ["E"],
-            #              rhs = [0.0])
-            #
-            #     max_cost > cost[j]
-            #     cons.add(names = ['set_max_cost[%d]' % info['idx']],
-            #              lin_expr = [SparsePair(ind = indices['max_cost_var_name'] + info['cost_var_name'], val = [1.0, -1.0])],
-            #              senses = ["G"],
-            #              rhs = [0.0])
-
         mip = set_cpx_parameters(mip, self._cpx_parameters)
         self._mip = mip
         self._mip_indices = indices
+        self._mip_col_idx = col_idx
+        self._mip_row_idx = row_idx
 
 
     #### MIP settings ###
@@ -834,23 +918,24 @@ class _RecourseBuilderCPX(RecourseBuilder):
         if sol.is_primal_feasible():
 
             indices = self._mip_indices
+            col_idx = self._mip_col_idx
             variable_idx = indices['var_idx']
 
             # parse actions
-            action_values = sol.get_values(indices['action_var_names'])
+            action_values = sol.get_values(col_idx['action_var'])
 
-            if 'cost_var_names' in indices and self.mip_cost_type != 'total':
-                cost_values = sol.get_values(indices['cost_var_names'])
+            if self.mip_cost_type == 'max':
+                cost_values = sol.get_values(col_idx['cost_var'])
             else:
-                ind_idx = np.flatnonzero(np.array(sol.get_values(indices['action_ind_names'])))
-                ind_names = [indices['action_ind_names'][int(k)] for k in ind_idx]
-                cost_values = mip.objective.get_linear(ind_names)
+                # indicators are binary, but can be off by a tiny amount after CPLEX repairs a MIP start
+                u_values = np.array(sol.get_values(col_idx['action_ind']))
+                cost_values = indices['action_ind_costs'][np.greater(u_values, 0.5)]
 
             actions = np.zeros(self.n_variables)
-            np.put(actions, variable_idx, action_values)
+            actions[variable_idx] = action_values
 
             costs = np.zeros(self.n_variables)
-            np.put(costs, variable_idx, cost_values)
+            costs[variable_idx] = cost_values
 
             info.update({
                 'feasible': True,
@@ -869,7 +954,7 @@ class _RecourseBuilderCPX(RecourseBuilder):
                 })
 
             if self.mip_cost_type == 'max':
-                info['cost'] = sol.get_values(indices['max_cost_var_name'])[0]
+                info['cost'] = sol.get_values(self._mip_col_idx['max_cost_var'])[0]
             else:
                 info['cost'] = info['upperbound']
 
@@ -885,22 +970,15 @@ class _RecourseBuilderCPX(RecourseBuilder):
 
 
     #### flipset geneation ###
-    def set_mip_min_items(self, n_items):
-        """
-        sets maximum number of non-zero elements in MIP (used by set_item_limits)
-        :param n_items:
-        :return:
-        """
-        self._mip.linear_constraints.set_rhs("min_items", n_items)
-
-
-    def set_mip_max_items(self, n_items):
+    def set_mip_min_max_items(self, min_items, max_items):
         """
-        sets maximum number of non-zero elements in MIP (used by set_item_limits)
-        :param n_items:
+        sets both limits on the number of non-zero elements in MIP in a single call (used by set_item_limits)
+        :param min_items:
+        :param max_items:
         :return:
         """
-        self._mip.linear_constraints.set_rhs("max_items", n_items)
+        row_idx = self._mip_row_idx
+        self._mip.linear_constraints.set_rhs([(row_idx['min_items'], min_items), (row_idx['max_items'], max_items)])
 
 
     def remove_all_features(self):
@@ -910,11 +988,11 @@ class _RecourseBuilderCPX(RecourseBuilder):
         """
         mip = self._mip
         ## "action_off_names" ex: ['u[3][0]', 'u[4][0]'...] are variables that indicate an action is "off".
-        feature_off_idxs = self._mip_indices['action_off_names']
+        feature_off_idxs = self._mip_col_idx['action_off']
         ## get the values assigned by the solver.
         values_of_off_indices = np.array(mip.solution.get_values(feature_off_idxs))
         ## if the "off index" are off (i.e. = 0), that means the action is "on"
-        on_idx = np.flatnonzero(np.isclose(values_of_off_indices, 0.0))
+        on_idx = np.flatnonzero(np.less(values_of_off_indices, 0.5))
         ## setting LB = 1 for the "off index" means that the action has to stay "off"
         mip.variables.set_lower_bounds([(feature_off_idxs[j], 1.0) for j in on_idx])
         return
@@ -940,19 +1018,18 @@ class _RecourseBuilderCPX(RecourseBuilder):
                     off_idx[j] = action_off_names[j]
         """
 
-        feature_off_idxs = self._mip_indices['nullify_ind_names']
+        feature_off_idxs = self._mip_col_idx['nullify_ind']
         u = np.array(mip.solution.get_values(feature_off_idxs))
 
-
         ## if the "off index" are off (i.e. = 0), that means the action is "on"
-        on_idx = np.isclose(u, 0.0)
+        on_idx = np.less(u, 0.5)
 
         ## array where con_val[i] = 1 if feature is off, -1 if feature is on.
-        con_vals = np.ones(len(feature_off_idxs), dtype = np.float_)
-        con_vals[on_idx] = -1.0
+        con_vals = 1.0 - 2.0 * on_idx
 
         ## one minus number of features that are off.
-        con_rhs =  np.sum(~on_idx) - 1
+        con_rhs = len(on_idx) - np.count_nonzero(on_idx) - 1
+
         mip.linear_constraints.add(lin_expr = [SparsePair(ind = feature_off_idxs, val = con_vals.tolist())],
                                    senses = ["L"],
                                    rhs = [float(con_rhs)])
@@ -961,8 +1038,8 @@ class _RecourseBuilderCPX(RecourseBuilder):
 
 class _RecourseBuilderPythonMIP(RecourseBuilder):
     def __init__(self, *args, **kwargs):
-        ## todo: not sure what to put for this. let's talk about what the cplex display flag does.
-        self._set_mip_display = lambda mip, display_flag: True #_set_mip_display(self, mip, display)
+        # CBC prints its log for every solve unless verbose is turned off
+        self._set_mip_display = lambda mip, display_flag: setattr(mip, 'verbose', int(display_flag))
 
         self._apriori_infeasible = False
         super().__init__(*args, **kwargs)
@@ -981,62 +1058,69 @@ class _RecourseBuilderPythonMIP(RecourseBuilder):
 
         # cost/action information
         build_info, indices = self._get_mip_build_info()
-        n_actionable = len(build_info)
+        n_actionable = len(build_info['names'])
         n_indicators = len(indices.get('action_ind_names', []))
 
         ## CHECK: note: if actiongrid is empty, build_info, indices == {}. Correct handling?
 
         # initialize mip
-        mip = Model()
+        # variables are stored in lists that follow the order of the names in indices
+        mip = Model(sense = MINIMIZE, solver_name = CBC)
+        # CBC output follows print_flag until fit / populate set the display flag for each solve
+        self._set_mip_display(mip, self.print_flag)
 
         # define variables a[j]
-        mip.a = {
-            a_j: mip.add_var(
-                name=a_j,
-                lb=indices['action_lb'][j],
-                ub=indices['action_ub'][j],
-                var_type='C',
-            )
-            for j, a_j in enumerate(indices['action_var_names'])
-        }
+        mip.a = [mip.add_var(name = name, lb = lb, ub = ub, var_type = CONTINUOUS)
+                 for name, lb, ub in zip(indices['action_var_names'], indices['action_lb'], indices['action_ub'])]
 
-        # sum_j w[j] a[j] > -score
-        ## TODO CHECK: this was a SparsePair in CPLEX... Python-Mip doesn't have this object.
         # score constraint
         # y_desired = +1 -> sum_j w[j]*(x[j]+a[j]) > 0 -> sum_j w[j] a[j] > -score
         # y_desired = -1 -> sum_j w[j]*(x[j]+a[j]) < 0 -> sum_j w[j] a[j] < -score
-        score_with_actions = xsum(
-            mip.a[a_j] * indices['coefficients'][j] for j, a_j in enumerate(indices['action_var_names'])
-        )
+        score_with_actions = LinExpr(mip.a, indices['coefficients'].tolist())
         if self.action_set.y_desired > 0:
             mip += score_with_actions >= -self.score(), 'flip_prediction'
         else:
             mip += score_with_actions <= -self.score(), 'flip_prediction'
 
         # define indicators u[j][k] = 1 if a[j] = actions[j][k]
-        mip.u = {
-            ind_name: mip.add_var(name=ind_name, var_type='B')
-                for ind_name in indices['action_ind_names']
-        }
+        mip.u = [mip.add_var(name = name, var_type = BINARY) for name in indices['action_ind_names']]
+
+        # define cost variables for the max cost function
+        if cost_type == 'max':
+            indices['max_cost_var_name'] = ['max_cost']
+            mip.max_cost_var = mip.add_var(name = 'max_cost', obj = 1, var_type = CONTINUOUS)
+            mip.c = [mip.add_var(name = name, var_type = CONTINUOUS, obj = indices['epsilon']) for name in indices['cost_var_names']]
+            costs = build_info['costs'].tolist()
 
         # restrict a[j] to feasible values using a 1 of K constraint setup
-        for info in build_info.values():
+        # all per-feature constraints are added in a single pass over the features
+        starts = build_info['starts']
+        actions = build_info['actions'].tolist()
+        for n, j in enumerate(build_info['idx']):
             # restrict a[j] to actions in feasible set and make sure exactly 1 indicator u[j][k] is on
             # 1. a[j] = sum_k u[j][k] * actions[j][k] - > 0.0 = sum_k u[j][k] * actions[j][k] - a[j]
             # 2. sum_k u[j][k] = 1.0
+            # 3. cost[j] = sum_k c[j][k] * u[j][k] (max cost only)
+            # 4. max_cost >= cost[j] (max cost only)
+            s, e = starts[n], starts[n + 1]
+            ind_vars = mip.u[s:e]
 
-            action_val = xsum(mip.u[info['action_ind_names'][k]] * info['actions'][k] for k in range(len(info['actions'])))
-            mip += action_val == mip.a[info['action_var_name'][0]], 'set_a[%d]' % info['idx']
+            action_val = LinExpr(ind_vars, actions[s:e])
+            mip += action_val == mip.a[n], 'set_a[%d]' % j
 
-            action_on = xsum(mip.u[info['action_ind_names'][k]] for k in range(len(info['actions'])))
-            mip += action_on == 1, "pick_a['%d']" % info['idx']
+            action_on = LinExpr(ind_vars, [1.0] * len(ind_vars))
+            mip += action_on == 1, "pick_a['%d']" % j
 
             # declare indicator variables as SOS set
             mip.add_sos(
-                sos=[(mip.u[info['action_ind_names'][k]], info['actions'][k]) for k in range(len(info['actions']))],
+                sos=list(zip(ind_vars, actions[s:e])),
                 sos_type=1,
             )
 
+            if cost_type == 'max':
+                mip += mip.c[n] == LinExpr(ind_vars, costs[s:e]), 'def_cost[%d]' % j
+                mip += mip.max_cost_var - mip.c[n] >= 0, 'set_max_cost[%d]' % j
+
         # limit number of features per action
         #
         # size := n_actionable - n_null where n_null := sum_j u[j][0] = sum_j 1[a[j] = 0]
@@ -1048,44 +1132,24 @@ class _RecourseBuilderPythonMIP(RecourseBuilder):
         # min_size <= size:
         # min_size          <=  n_actionable - sum_j u[j][0]
         # sum_j u[j][0]     <=  n_actionable - min_size
-        num_off = xsum(mip.u[indices['action_off_names'][k]] for k in range(n_actionable))
-        mip += num_off >= float(n_actionable - max_items), 'max_items'
-        mip += num_off <= float(n_actionable - min_items), 'min_items'
+        # cache indicators that are queried after each solve and the size constraints that are updated by set_mip_item_limits
+        mip.u_off = tuple(mip.u[k] for k in starts[:-1])
+        num_off = LinExpr(mip.u_off, [1.0] * n_actionable)
+        mip.max_items_constr = mip.add_constr(num_off >= float(n_actionable - max_items), 'max_items')
+        mip.min_items_constr = mip.add_constr(num_off <= float(n_actionable - min_items), 'min_items')
 
         # add constraints for categorical variables
+        null_idx = build_info['null_idx']
         for idx, c in enumerate(self.action_set.constraints):
             # c.lb <= k - \sum_ {j \ in indices} u[j][0] <= c.ub
             k = len(c.indices)
-            null_names = [indices['nullify_ind_names'][j] for j in c.indices]
-            num_on = k - xsum(mip.u[j] for j in null_names)
+            num_on = k - LinExpr([mip.u[null_idx[j]] for j in c.indices], [1.0] * k)
             mip += num_on >= c.lb, 'constr_%d_lb' % idx
             mip += num_on <= c.ub, 'constr_%d_ub' % idx
 
-        # add constraints for cost function
+        # for the total and local cost functions, c[j][k] is the objective coefficient of u[j][k]
         if cost_type in ('total', 'local'):
-            indices.pop('cost_var_names')
-            objval_pairs = list(
-                chain(*[list(zip(v['action_ind_names'], v['costs'])) for v in build_info.values()])
-            )
-            self.cost_lookup_for_sol = dict(objval_pairs)
-            mip.objective = xsum(mip.u[k] * c for k, c in objval_pairs)
-
-        elif cost_type == 'max':
-            indices['max_cost_var_name'] = ['max_cost']
-            ## handle empty actionsets
-            indices['epsilon'] = np.min(indices['cost_df'] or np.inf) / np.sum(indices['cost_ub'])
-            mip.max_cost_var = mip.add_var(name='max_cost', obj=1, var_type='C')
-            mip.c = {
-                c: mip.add_var(name=c, var_type='C', obj=indices['epsilon'])
-                for c in indices['cost_var_names']
-            }
-
-            for info in build_info.values():
-                ## def cost
-                cost_var = xsum(info['costs'][k] * mip.u[info['action_ind_names'][k]] for k in range(len(info['costs'])))
-                mip += mip.c[info['cost_var_name'][0]] == cost_var, 'def_cost[%d]' % info['idx']
-                ## set max cost
-                mip += mip.max_cost_var - mip.c[info['cost_var_name'][0]] >= 0, 'set_max_cost[%d]' % info['idx']
+            mip.objective = LinExpr(mip.u, indices['action_ind_costs'].tolist())
 
         self._mip = mip
         self._mip_indices = indices
@@ -1125,22 +1189,19 @@ class _RecourseBuilderPythonMIP(RecourseBuilder):
             variable_idx = indices['var_idx']
 
             # parse actions
-            action_values = [self._mip.a[k].x for k in indices['action_var_names']]
+            action_values = _get_mip_var_values(self._mip.a)
 
-            if 'cost_var_names' in indices and self.mip_cost_type != 'total':
-                cost_values = [self._mip.c[k].x for k in indices['cost_var_names']]
+            if self.mip_cost_type == 'max':
+                cost_values = _get_mip_var_values(self._mip.c)
             else:
-                ind_idx = [self._mip.u[k].x for k in indices['action_ind_names']]
-                ind_idx = np.flatnonzero(np.array(ind_idx))
-                ## TODO: check
-                ind_names = [indices['action_ind_names'][int(k)] for k in ind_idx]
-                cost_values = [self.cost_lookup_for_sol[k] for k in ind_names]
+                u_values = _get_mip_var_values(self._mip.u)
+                cost_values = indices['action_ind_costs'][np.greater(u_values, 0.5)]
 
             actions = np.zeros(self.n_variables)
-            np.put(actions, variable_idx, action_values)
+            actions[variable_idx] = action_values
 
             costs = np.zeros(self.n_variables)
-            np.put(costs, variable_idx, cost_values)
+            costs[variable_idx] = cost_values
 
             info.update({
                 'feasible': True,
@@ -1176,37 +1237,30 @@ class _RecourseBuilderPythonMIP(RecourseBuilder):
 
 
     #### flipset geneation ###
-    def set_mip_min_items(self, n_items):
+    def set_mip_min_max_items(self, min_items, max_items):
         """
-        sets maximum number of non-zero elements in MIP (used by set_item_limits)
-        :param n_items:
-        :return:
-        """
-        self._mip.constr_by_name('min_items').rhs = n_items
-
-
-    def set_mip_max_items(self, n_items):
-        """
-        sets maximum number of non-zero elements in MIP (used by set_item_limits)
-        :param n_items:
+        sets both limits on the number of non-zero elements in MIP (used by set_item_limits)
+        :param min_items:
+        :param max_items:
         :return:
         """
-        self._mip.constr_by_name('max_items').rhs = n_items
+        self._mip.min_items_constr.rhs = min_items
+        self._mip.max_items_constr.rhs = max_items
 
     def remove_all_features(self):
         """
         removes feature combination from feasible region of MIP
         :return:
         """
-        ## "action_off_names" ex: ['u[3][0]', 'u[4][0]'...] are variables that indicate an action is "off".
-        feature_off_idxs = self._mip_indices['action_off_names']
+        ## "u_off" ex: [u[3][0], u[4][0]...] are variables that indicate an action is "off".
+        feature_off_vars = self._mip.u_off
         ## get the values assigned by the solver.
-        values_of_off_indices = [self._mip.u[k].x for k in feature_off_idxs]
+        values_of_off_indices = _get_mip_var_values(feature_off_vars)
         ## if the "off index" are off (i.e. = 0), that means the action is "on"
-        on_idx = np.flatnonzero(np.isclose(values_of_off_indices, 0.0))
+        on_idx = np.flatnonzero(np.less(values_of_off_indices, 0.5))
         ## setting LB = 1 for the "off index" means that the action has to stay "off"
         for j in on_idx:
-            self._mip.u[feature_off_idxs[j]].lb = 1.0
+            feature_off_vars[j].lb = 1.0
         return
 
 
@@ -1215,17 +1269,16 @@ class _RecourseBuilderPythonMIP(RecourseBuilder):
         removes feature combination from feasible region of MIP
         :return:
         """
-        feature_off_idxs = self._mip_indices['action_off_names']
-        values_of_off_indices = [self._mip.u[k].x for k in feature_off_idxs]
+        feature_off_vars = self._mip.u_off
+        values_of_off_indices = _get_mip_var_values(feature_off_vars)
         ## if the "off index" are off (i.e. = 0), that means the action is "on"
-        on_idx = np.isclose(values_of_off_indices, 0.0)
+        on_idx = np.less(values_of_off_indices, 0.5)
         ## array where con_val[i] = 1 if feature is off, -1 if feature is on.
-        con_vals = np.ones(len(feature_off_idxs), dtype = np.float_)
-        con_vals[on_idx] = -1.0
+        con_vals = 1.0 - 2.0 * on_idx
         ## one minus number of features that are off.
-        con_rhs = np.sum(~on_idx) - 1
+        con_rhs = len(on_idx) - np.count_nonzero(on_idx) - 1
         ## TODO Check if -1 is still valid if we can only do <=
-        self._mip += xsum(self._mip.u[k] * con_vals[i] for i, k in enumerate(feature_off_idxs)) <= float(con_rhs)
+        self._mip += LinExpr(feature_off_vars, con_vals.tolist()) <= float(con_rhs)
         return
 
 
@@ -1233,3 +1286,47 @@ BUILDER_TO_SOLVER = {
     _SOLVER_TYPE_CPX: _RecourseBuilderCPX,
     _SOLVER_TYPE_PYTHON_MIP: _RecourseBuilderPythonMIP
 }
+
+
+# builder used by each worker process of solve_batch (CPLEX / Python-MIP objects cannot be pickled)
+_batch_builder = None
+
+
+def _init_batch_worker(action_set, coefficients, intercept, kwargs):
+    global _batch_builder
+    _batch_builder = RecourseBuilder(action_set = action_set, coefficients = coefficients, intercept = intercept, **kwargs)
+
+
+def _solve_batch_item(x):
+    _batch_builder.x = x
+    return _batch_builder.fit()
+
+
+def solve_batch(action_set, X, coefficients, intercept = 0.0, n_jobs = None, **kwargs):
+    """
+    solve the recourse problem for each row of X in parallel
+
+    each worker process builds a single RecourseBuilder when it starts and reuses it for all points that it solves,
+    so only the action set, coefficients, and intercept are sent to the workers
+
+    :param action_set: ActionSet for features
+    :param X: feature matrix (np.array or pd.DataFrame)
+    :param coefficients: vector of coefficients of the linear classifier
+    :param intercept: intercept of the linear classifier (0.0 by default)
+    :param n_jobs: number of worker processes (set to the number of processors by default)
+    :param kwargs: other arguments passed to RecourseBuilder (e.g. solver, mip_cost_type, print_flag)
+    :return: list containing the solution information from RecourseBuilder.fit for each row of X
+    """
+    X = np.asarray(X, dtype = np.float64)
+    assert X.ndim == 2
+    assert X.shape[1] == len(action_set)
+
+    if not action_set.alignment_known:
+        action_set.set_alignment(coefficients)
+
+    with ProcessPoolExecutor(max_workers = n_jobs,
+                             initializer = _init_batch_worker,
+                             initargs = (action_set, coefficients, intercept, kwargs)) as executor:
+        output = list(executor.map(_solve_batch_item, X))
+
+    return output
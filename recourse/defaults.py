@@ -1,4 +1,5 @@
 # This file contains constants used in actionable-recourse
+import os
 
 ### Solver ###
 
@@ -30,30 +31,30 @@ def _check_solver_python_mip():
 _SOLVER_TYPE_CPX = 'cplex'
 _SOLVER_TYPE_PYTHON_MIP = 'python-mip'
 
+# Build List of Supported Solvers (each solver is only looked up once)
+SUPPORTED_SOLVERS = []
+
+if _check_solver_cpx():
+    SUPPORTED_SOLVERS.append(_SOLVER_TYPE_CPX)
+
+if _check_solver_python_mip():
+    SUPPORTED_SOLVERS.append(_SOLVER_TYPE_PYTHON_MIP)
+
+SUPPORTED_SOLVERS = tuple(SUPPORTED_SOLVERS)
+
 # Set Default Solver
 def set_default_solver():
 
-    if _check_solver_cpx():
+    if _SOLVER_TYPE_CPX in SUPPORTED_SOLVERS:
         return _SOLVER_TYPE_CPX
 
-    if _check_solver_python_mip():
+    if _SOLVER_TYPE_PYTHON_MIP in SUPPORTED_SOLVERS:
         return _SOLVER_TYPE_PYTHON_MIP
 
     raise ModuleNotFoundError('could not find installed MIP solver')
 
 DEFAULT_SOLVER = set_default_solver()
 
-# Build List of Supported Solvers
-SUPPORTED_SOLVERS = []
-
-if _check_solver_cpx():
-    SUPPORTED_SOLVERS.append(_SOLVER_TYPE_CPX)
-
-if _check_solver_python_mip():
-    SUPPORTED_SOLVERS.append(_SOLVER_TYPE_PYTHON_MIP)
-
-SUPPORTED_SOLVERS = tuple(SUPPORTED_SOLVERS)
-
 
 ### Cost Function Types ###
 
@@ -65,3 +66,11 @@ DEFAULT_FLIPSET_COST_TYPE = 'local'
 
 VALID_ENUMERATION_TYPES = {'mutually_exclusive', 'distinct_subsets'}
 DEFAULT_ENUMERATION_TYPE = 'distinct_subsets'
+
+
+### Internal Checks ###
+
+# checks of internal representations, MIP build information, and MIP solutions are on by default
+# they are turned off when python is run with -O or when the environment variable RECOURSE_CHECKS is set to 0
+# (individual objects can still turn them on or off using check_flag)
+CHECKS_ENABLED = __debug__ and os.environ.get('RECOURSE_CHECKS', '1') != '0'
@@ -38,7 +38,7 @@ class Flipset(object):
 
         # attach feature vector
         assert isinstance(x, (list, np.ndarray))
-        self._x = np.array(x, dtype = np.float_).flatten()
+        self._x = np.array(x, dtype = np.float64).ravel()
 
         # attach coefficients
         self._coefs, self._intercept = parse_classifier_args(**kwargs)
@@ -374,7 +374,7 @@ class Flipset(object):
         :param a: action vector
         :return: a or AssertionError
         """
-        a = np.array(a, dtype = np.float_).flatten()
+        a = np.array(a, dtype = np.float64).ravel()
         assert len(a) == self._n_variables, 'action vector must have %d elements' % self.n_variables
         assert np.isfinite(a).all(), 'actions must be finite'
         assert np.count_nonzero(a) >= 1, 'at least one action element must be non zero'
@@ -68,16 +68,19 @@ def parse_classifier_args(*args, **kwargs):
     else:
         raise ValueError('failed to match classifier arguments')
 
-    w = np.array(w).flatten()
+    w = np.array(w, dtype = np.float64).ravel()
     t = float(t)
     assert np.isfinite(w).all()
     assert np.isfinite(t)
     return w, t
 
-import seaborn as sns
 
 # X is the data to audit on
 def print_recourse_audit_report(X, audit_df, y, group_by = ['y']):
+    # plotting libraries are only needed here, so importing recourse does not pull them in
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+
     processed_data = (audit_df
                             .merge(X, right_index=True, left_index=True)
                             .merge(y.to_frame('y'), right_index=True, left_index=True)
@@ -8,11 +8,12 @@
 
 # fit
 # populate
+import warnings
 import pytest
 import numpy as np
-from recourse.defaults import SUPPORTED_SOLVERS
+from recourse.defaults import SUPPORTED_SOLVERS, _SOLVER_TYPE_CPX, _SOLVER_TYPE_PYTHON_MIP
 from recourse.action_set import ActionSet
-from recourse.builder import RecourseBuilder
+from recourse.builder import RecourseBuilder, solve_batch
 
 def test_rb_fit_without_initialization(data, recourse_builder):
     """Test fitting on a denied individual, CPLEX."""
@@ -78,6 +79,211 @@ def test_rb_fit(data, recourse_builder, features):
     assert output['cost'] >= 0.0
 
 
+@pytest.mark.parametrize("solver", SUPPORTED_SOLVERS)
+def test_solve_batch(data, classifier, action_set, solver):
+    action_set.set_alignment(classifier)
+    yhat = classifier.predict(data['X'])
+    X = data['X'].values[np.flatnonzero(np.less_equal(yhat, 0))[:4]]
+    coefs, intercept = classifier.coef_[0], classifier.intercept_[0]
+
+    output = solve_batch(action_set, X, coefs, intercept, n_jobs = 2, solver = solver, print_flag = False)
+    assert len(output) == X.shape[0]
+
+    rb = RecourseBuilder(action_set = action_set, coefficients = coefs, intercept = intercept, solver = solver, print_flag = False)
+    for x, info in zip(X, output):
+        rb.x = x
+        assert np.isclose(info['cost'], rb.fit()['cost'])
+
+
+@pytest.mark.parametrize("solver", SUPPORTED_SOLVERS)
+def test_rb_invalid_cost_type(action_set, classifier, solver):
+    action_set.set_alignment(classifier)
+    with pytest.raises(ValueError):
+        RecourseBuilder(action_set = action_set, clf = classifier, solver = solver, mip_cost_type = 'median')
+
+
+@pytest.mark.parametrize("solver", SUPPORTED_SOLVERS)
+def test_rb_solutions_are_checked(classifier, action_set, features, solver):
+    action_set.set_alignment(classifier)
+    rb = RecourseBuilder(action_set = action_set, clf = classifier, solver = solver, mip_cost_type = 'total', print_flag = False)
+    rb.x = features
+
+    # record each solution passed to the check
+    checked = []
+    check_mip_solution = rb._check_mip_solution
+    def record_and_check(info):
+        checked.append(info)
+        return check_mip_solution(info)
+    rb._check_mip_solution = record_and_check
+
+    info = rb.fit()
+    assert checked == [info]
+
+    # rebuild the MIP before populating (CBC cannot re-solve a model after fit)
+    rb.x = features
+    items = rb.populate(total_items = 2)
+    assert all(any(item is c for c in checked) for item in items)
+
+
+@pytest.mark.parametrize("solver", SUPPORTED_SOLVERS)
+@pytest.mark.parametrize("mip_cost_type", ['max', 'total', 'local'])
+def test_rb_check_mip_solution(classifier, action_set, features, solver, mip_cost_type):
+    action_set.set_alignment(classifier)
+    rb = RecourseBuilder(action_set = action_set, clf = classifier, solver = solver, mip_cost_type = mip_cost_type, print_flag = False)
+    rb.x = features
+    info = rb.fit()
+    assert info['feasible']
+    assert rb._check_mip_solution(info)
+
+    # a solution without any actions cannot flip the prediction
+    with pytest.raises(AssertionError):
+        rb._check_mip_solution(dict(info, actions = np.zeros_like(info['actions'])))
+
+
+@pytest.mark.parametrize("solver", SUPPORTED_SOLVERS)
+def test_rb_check_mip_solution_approved(data, classifier, action_set, solver):
+    action_set.set_alignment(classifier)
+    yhat = classifier.predict(data['X'])
+    X = data['X'].values[np.flatnonzero(np.greater(yhat, 0))[:4]]
+    rb = RecourseBuilder(action_set = action_set, clf = classifier, solver = solver, print_flag = False)
+
+    # points that already have the desired outcome pass the check without warnings
+    for x in X:
+        rb.x = x
+        with warnings.catch_warnings(record = True) as caught:
+            warnings.simplefilter('always')
+            info = rb.fit()
+        assert info['feasible']
+        assert not any('numerical issue' in str(w.message) for w in caught)
+
+
+@pytest.mark.parametrize("solver", SUPPORTED_SOLVERS)
+def test_rb_x_is_read_only(classifier, action_set, features, solver):
+    action_set.set_alignment(classifier)
+    rb = RecourseBuilder(action_set = action_set, clf = classifier, solver = solver, print_flag = False)
+    rb.x = features
+    mip = rb.mip
+
+    # x is returned as a read-only view
+    x = rb.x
+    assert not x.flags.writeable
+    with pytest.raises(ValueError):
+        x[0] = x[0] + 1.0
+    assert np.array_equal(rb.x, features)
+
+    # assigning through the setter copies the values and rebuilds the MIP
+    x_new = x.copy()
+    rb.x = x_new
+    x_new[0] = x_new[0] + 1.0
+    assert rb.mip is not mip
+    assert np.array_equal(rb.x, features)
+    assert rb.fit()['feasible']
+
+
+@pytest.mark.parametrize("solver", SUPPORTED_SOLVERS)
+@pytest.mark.parametrize("item_limits", [(1, 1), (2, 3), (3, None), (None, 2)])
+def test_rb_item_limits(classifier, action_set, features, solver, item_limits):
+    action_set.set_alignment(classifier)
+    rb = RecourseBuilder(action_set = action_set, clf = classifier, solver = solver, print_flag = False)
+    rb.x = features
+    n_items = np.count_nonzero(~np.isclose(rb.fit()['actions'], 0.0))
+
+    # the unconstrained solution is feasible when both limits are set to its size (build a new MIP for each solve)
+    rb.x = features
+    rb.set_mip_item_limits(min_items = n_items, max_items = n_items)
+    info = rb.fit()
+    assert info['feasible']
+    assert np.count_nonzero(~np.isclose(info['actions'], 0.0)) == n_items
+
+    # limits that are not passed are left unchanged
+    rb = RecourseBuilder(action_set = action_set, clf = classifier, solver = solver, print_flag = False)
+    rb.x = features
+    min_items, max_items = item_limits
+    rb.set_mip_item_limits(min_items = min_items, max_items = max_items)
+    assert rb.min_items == (0 if min_items is None else min_items)
+    assert rb.max_items == (rb.n_actionable if max_items is None else max_items)
+    rb.set_mip_item_limits()
+    assert rb.min_items == (0 if min_items is None else min_items)
+    assert rb.max_items == (rb.n_actionable if max_items is None else max_items)
+
+    info = rb.fit()
+    if info['feasible']:
+        assert rb.min_items <= np.count_nonzero(~np.isclose(info['actions'], 0.0)) <= rb.max_items
+
+
+@pytest.mark.parametrize("solver", SUPPORTED_SOLVERS)
+def test_rb_nan_costs(classifier, action_set, features, solver):
+    action_set.set_alignment(classifier)
+    rb = RecourseBuilder(action_set = action_set, clf = classifier, solver = solver, print_flag = False)
+    nan_cost = lambda c, c0: np.full_like(c, np.nan)
+    rb._cost_functions = (nan_cost, nan_cost)
+    with pytest.raises(ValueError):
+        rb.x = features
+
+
+def test_rb_python_mip_display(classifier, action_set, features):
+    if _SOLVER_TYPE_PYTHON_MIP not in SUPPORTED_SOLVERS:
+        pytest.skip('python-mip is not installed')
+
+    action_set.set_alignment(classifier)
+    rb = RecourseBuilder(action_set = action_set, clf = classifier, solver = _SOLVER_TYPE_PYTHON_MIP, print_flag = False)
+    rb.x = features
+    assert rb.mip.verbose == 0
+
+    # the model is rebuilt with the new print_flag when x is set
+    rb.print_flag = True
+    rb.x = features
+    assert rb.mip.verbose == 1
+
+    # the display flag passed to fit controls the output of each solve
+    rb.fit(display_flag = False)
+    assert rb.mip.verbose == 0
+    rb.mip_display = True
+    assert rb.mip.verbose == 1
+
+
+@pytest.mark.parametrize("mip_cost_type", ['max', 'total', 'local'])
+def test_rb_cplex_column_indices(classifier, action_set, features, mip_cost_type):
+    if _SOLVER_TYPE_CPX not in SUPPORTED_SOLVERS:
+        pytest.skip('cplex is not installed')
+
+    action_set.set_alignment(classifier)
+    rb = RecourseBuilder(action_set = action_set, clf = classifier, solver = _SOLVER_TYPE_CPX, mip_cost_type = mip_cost_type, print_flag = False)
+    rb.x = features
+
+    # cached column indices must point at the variables with the matching names
+    get_indices = rb.mip.variables.get_indices
+    names = {
+        'action_var': 'action_var_names',
+        'action_ind': 'action_ind_names',
+        'action_off': 'action_off_names',
+        'nullify_ind': 'nullify_ind_names',
+        }
+    if mip_cost_type == 'max':
+        names.update({'cost_var': 'cost_var_names', 'max_cost_var': 'max_cost_var_name'})
+
+    assert set(rb._mip_col_idx) == set(names)
+    for field, name in names.items():
+        assert rb._mip_col_idx[field] == tuple(get_indices(list(rb._mip_indices[name])))
+
+
+@pytest.mark.parametrize("mip_cost_type", ['max', 'total', 'local'])
+def test_rb_cplex_populate_distinct_subsets(data, classifier, action_set, mip_cost_type):
+    if _SOLVER_TYPE_CPX not in SUPPORTED_SOLVERS:
+        pytest.skip('cplex is not installed')
+
+    action_set.set_alignment(classifier)
+    rb = RecourseBuilder(action_set = action_set, clf = classifier, solver = _SOLVER_TYPE_CPX, mip_cost_type = mip_cost_type, print_flag = False)
+    yhat = classifier.predict(data['X'])
+    for x in data['X'].values[np.flatnonzero(np.less_equal(yhat, 0))[:10]]:
+        rb.x = x
+        items = rb.populate(total_items = 6, enumeration_type = 'distinct_subsets')
+
+        # each item must change a different set of features
+        supports = [tuple(np.flatnonzero(~np.isclose(item['actions'], 0.0))) for item in items]
+        assert len(set(supports)) == len(supports)
+
+
 def test_empty_fit(data, features, action_set, coefficients, classifier, recourse_builder):
     names = data['X'].columns.tolist()
     action_set.set_alignment(classifier)